@@ -3,7 +3,105 @@ Python-based trajectory classes that wrap loos.Trajectory objects
 
 """
 import loos
-import copy
+import numpy
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Serial number of the most recent frame read performed through this module.
+# A Trajectory's cached last-read frame is only valid if no other Trajectory
+# has updated the (possibly shared) model since, which this detects.
+_read_serial = 0
+
+
+## Translate an array of (possibly negative) framelist indices into real
+# frame numbers.  JIT-compiled when numba is available; otherwise falls back
+# to a vectorized numpy version.
+try:
+    from numba import njit
+
+    @njit(cache=True)
+    def _frameNumbers(framelist, indices):
+        n = framelist.size
+        out = numpy.empty_like(indices)
+        for k in range(indices.size):
+            j = indices[k]
+            if j < 0:
+                j += n
+            if j < 0 or j >= n:
+                raise IndexError("frame index out of range")
+            out[k] = framelist[j]
+        return(out)
+
+except ImportError:
+
+    def _frameNumbers(framelist, indices):
+        return(numpy.take(framelist, indices))
+
+
+# VirtualTrajectory packs each (trajectory, frame) pair into one int64 so
+# the hot dispatch path loads a single array element: trajectory index in
+# the high 16 bits, frame index in the low 48.
+_PACK_SHIFT = 48
+_PACK_MASK = (1 << _PACK_SHIFT) - 1
+
+
+## Convert a loos.GMatrix (4x4 transform) into a numpy array and back
+def _gmatrixToArray(m):
+    return(numpy.fromiter((m[k] for k in range(16)),
+                          dtype=numpy.float64).reshape(4, 4))
+
+
+def _xformFromArray(mat):
+    m = loos.GMatrix()
+    flat = mat.reshape(16)
+    for k in range(16):
+        m[k] = float(flat[k])
+    x = loos.XForm()
+    x.load(m)
+    return(x)
+
+
+class _Prefetcher(object):
+    """
+    Background reader that stays up to depth frames ahead of a consumer in
+    iteration order, using its own trajectory handle and a decoupled model
+    so the consumer's state is untouched.  The decoded frames themselves are
+    discarded; the point is that the consumer's subsequent reads hit warm
+    OS caches instead of waiting on the disk.
+    """
+
+    def __init__(self, fname, model, framelist, depth):
+        self._traj = loos.createTrajectory(fname, model.copy())
+        self._framelist = framelist
+        self._depth = depth
+        self._consumed = 0
+        self._done = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for k in range(self._framelist.size):
+            with self._cond:
+                while not self._done and k >= self._consumed + self._depth:
+                    self._cond.wait()
+                if self._done:
+                    return
+            try:
+                self._traj.readFrame(int(self._framelist[k]))
+            except Exception:
+                return
+
+    def advance(self, index):
+        with self._cond:
+            self._consumed = index
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._done = True
+            self._cond.notify()
 
 ## Python-based wrapper for LOOS Trajectories
 # This class turns a loos Trajectory into something more
@@ -17,6 +115,7 @@ import copy
 # stride=n   | Step through the wrapped trajectory n-frames at a time
 # iterator=i | Use the python iterator object i to select frames from the wrapped trajectory
 # subset=s   | Use 's' to select a subset of the model to use for each frame
+# prefetch=k | Read ahead k frames in a background thread while iterating
 #
 # Remember that all atoms are shared.  If you want to decouple the
 # trajectory from other groups, pass it a copy of the model.
@@ -63,6 +162,8 @@ class Trajectory(object):
       stride = # of frames to step through
     iterator = Python iterator used to pick frame (overrides skip and stride)
       subset = Selection used to pick subset for each frame
+    prefetch = # of frames to read ahead in a background thread while
+               iterating (0, the default, disables prefetching)
 
     See the Doxygen documentation for more details.
     """
@@ -84,39 +185,73 @@ class Trajectory(object):
             self._subset = loos.selectAtoms(model, kwargs['subset'])
         else:
             self._subset = model
+        if 'prefetch' in kwargs:
+            self._prefetch = kwargs['prefetch']
+        else:
+            self._prefetch = 0
+        self._prefetcher = None
 
         self._model = model
         self._fname = fname
         self._traj = loos.createTrajectory(fname, model)
 
-        self._stale = 1
+        self._version = 1
+        self._built_version = 0
+        self._last_read = (-1, -1)
         self._initFrameList()
 
 
+    def _readFrameIndex(self, fidx):
+        global _read_serial
+        if self._last_read == (fidx, _read_serial):
+            return
+        self._traj.readFrame(fidx)
+        self._traj.updateGroupCoords(self._model)
+        _read_serial += 1
+        self._last_read = (fidx, _read_serial)
+
+    def invalidate(self):
+        """
+        Force the next access to re-read its frame from disk.  Only needed
+        if the model's coordinates have been changed outside this Trajectory.
+        """
+        self._last_read = (-1, -1)
+
     def _initFrameList(self):
-        self._framelist = []
         if self._iterator is None:
-            it = range(self._skip, self._traj.nframes(), self._stride)
+            self._framelist = numpy.arange(self._skip, self._traj.nframes(),
+                                           self._stride, dtype=numpy.int64)
         else:
-            it = iter(self._iterator)
-
-        for i in it:
-            self._framelist.append(i)
+            self._framelist = numpy.fromiter(self._iterator, dtype=numpy.int64)
 
+        self._n = self._framelist.size
+        # With no skip, stride, or iterator the framelist is an identity map
+        # (frame i is trajectory frame i), so hot paths skip the array load.
+        self._identity = (self._iterator is None and self._skip == 0
+                          and self._stride == 1)
         self._index = 0
-        self._stale = 0
+        self._built_version = self._version
+
+    def _invalidate(self):
+        self._version += 1
+
+    def _ensureFrameList(self):
+        if self._built_version != self._version:
+            self._initFrameList()
 
     def stride(self, n):
         """
         Step through the trajectory by this number of frames
         """
         self._stride = n
+        self._invalidate()
 
     def skip(self, n):
         """
         Skip this number of frames at the start of the trajectory
         """
         self._skip = n
+        self._invalidate()
 
     def fileName(self):
         """
@@ -133,31 +268,59 @@ class Trajectory(object):
 
 
     def __iter__(self):
-        if self._stale:
-            self._initFrameList()
+        self._ensureFrameList()
         self._index = 0
+        if self._prefetch > 0:
+            self.close()
+            self._prefetcher = _Prefetcher(self._fname, self._model,
+                                           self._framelist, self._prefetch)
         return(self)
 
     def __len__(self):
         """
         Number of frames in the trajectory
         """
-        if self._stale:
-            self._initFrameList()
-        return(len(self._framelist))
+        self._ensureFrameList()
+        return(self._n)
 
 
     def reset(self):
         """Reset the iterator"""
         self._index = 0
+        self.close()
+
+    def close(self):
+        """
+        Stop the background prefetcher, releasing its thread and trajectory
+        handle.  Called automatically when iteration finishes or restarts,
+        on reset(), and on deletion; only needed explicitly if iteration was
+        abandoned early and the Trajectory is kept around.
+        """
+        if self._prefetcher is not None:
+            self._prefetcher.stop()
+            self._prefetcher = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
 
     def __next__(self):
-        if (self._index >= len(self._framelist)):
+        # Inlined hot path: one bounds check and one read per frame, with no
+        # detour through __getitem__'s slice and negative-index handling.
+        if self._built_version != self._version:
+            self._initFrameList()
+        i = self._index
+        if (i >= self._n):
+            self.close()
             raise StopIteration
-        frame = self.__getitem__(self._index)
+        self._readFrameIndex(i if self._identity else int(self._framelist[i]))
 
-        self._index += 1
-        return(frame)
+        self._index = i + 1
+        if self._prefetcher is not None:
+            self._prefetcher.advance(i + 1)
+        return(self._subset)
 
 
     def trajectory(self):
@@ -170,12 +333,10 @@ class Trajectory(object):
 
     def readFrame(self, i):
         """Read a frame and update the model"""
-        if self._stale:
-            self._initFrameList()
-        if (i < 0 or i >= len(self._framelist)):
+        self._ensureFrameList()
+        if (i < 0 or i >= self._n):
             raise IndexError
-        self._traj.readFrame(self._framelist[i])
-        self._traj.updateGroupCoords(self._model)
+        self._readFrameIndex(int(i) if self._identity else int(self._framelist[i]))
         return(self._subset)
 
     def frame(self):
@@ -184,9 +345,8 @@ class Trajectory(object):
 
     def realIndex(self):
         """The 'real' frame in the trajectory for this index"""
-        if self._stale:
-            self._initFrameList()
-        return(self._framelist[self._index-1])
+        self._ensureFrameList()
+        return(int(self._framelist[self._index-1]))
 
     def index(self):
         """The state of the iterator"""
@@ -206,45 +366,79 @@ class Trajectory(object):
         [50, 51]
         """
 
-        if self._stale:
-            self._initFrameList()
+        self._ensureFrameList()
         if type(i) is int:
             if (i < 0):
-                i += len(self._framelist)
-            return(self._framelist[i])
+                i += self._n
+            return(int(self._framelist[i]))
 
-        indices = [x if x >=0 else len(self._framelist)+x for x in i]
-        framenos = [self._framelist[x] for x in indices]
-        return(framenos)
+        indices = numpy.asarray(i, dtype=numpy.int64)
+        return(_frameNumbers(self._framelist, indices).tolist())
 
 
     def _getSlice(self, s):
-        if self._stale:
-            self._initFrameList()
+        self._ensureFrameList()
         indices = list(range(*s.indices(self.__len__())))
         ensemble = []
         for i in indices:
-            self._traj.readFrame(self._framelist[i])
-            self._traj.updateGroupCoords(self._model)
+            self._readFrameIndex(int(self._framelist[i]))
             dup = self._subset.copy()
             ensemble.append(dup)
         return(ensemble)
 
 
+    def iterSlice(self, s=None):
+        """
+        Generator over a slice of the trajectory.  Yields one copied frame at
+        a time, so peak memory stays at a single frame where slicing
+        materializes the whole ensemble.  The argument is a slice object
+        (None means every frame).
+        >>> for frame in traj.iterSlice(slice(0, 1000)):
+        """
+        self._ensureFrameList()
+        if s is None:
+            s = slice(None)
+        for i in range(*s.indices(self._n)):
+            self._readFrameIndex(int(self._framelist[i]))
+            yield(self._subset.copy())
+
+
+    def coordsForSlice(self, s=None, dtype=numpy.float32):
+        """
+        Read a batch of frames and return the subset coordinates as a single
+        contiguous (nframes, natoms, 3) numpy array.  The argument may be a
+        slice, an iterable of indices, or None (meaning every frame).  Unlike
+        slicing, which copies an AtomicGroup per frame, this fills one
+        preallocated buffer.
+        >>> coords = traj.coordsForSlice(slice(0, 100))
+        """
+        self._ensureFrameList()
+        if s is None:
+            indices = range(self._n)
+        elif isinstance(s, slice):
+            indices = range(*s.indices(self._n))
+        else:
+            indices = [x if x >= 0 else self._n + x for x in s]
+
+        coords = numpy.empty((len(indices), len(self._subset), 3), dtype=dtype)
+        for (j, i) in enumerate(indices):
+            self._readFrameIndex(int(self._framelist[i]))
+            coords[j] = self._subset.getCoords()
+        return(coords)
+
+
     def __getitem__(self, i):
         """Handle array indexing and slicing.  Negative indices are
         relative to the end of the trajectory"""
-        if self._stale:
-            self._initFrameList()
+        self._ensureFrameList()
         if isinstance(i, slice):
             return(self._getSlice(i))
 
         if (i < 0):
-            i += len(self._framelist)
-        if (i >= len(self._framelist) or i < 0):
+            i += self._n
+        if (i >= self._n or i < 0):
             raise IndexError
-        self._traj.readFrame(self._framelist[i])
-        self._traj.updateGroupCoords(self._model)
+        self._readFrameIndex(int(i) if self._identity else int(self._framelist[i]))
         return(self._subset)
 
 
@@ -324,7 +518,9 @@ class VirtualTrajectory(object):
         self._index = 0
         self._framelist = []
         self._trajlist = []
-        self._stale = 1
+        self._n = 0
+        self._version = 1
+        self._built_version = 0
 
         if 'skip' in kwargs:
             self._skip = kwargs['skip']
@@ -357,27 +553,34 @@ class VirtualTrajectory(object):
                     raise TypeError("Inputs to VirtualTrajectory must be pyloos Trajectory objects")
 
         self._trajectories.extend(traj)
-        self._stale = 1
+        self._invalidate()
+
+    def _invalidate(self):
+        self._version += 1
+
+    def _ensureFrameList(self):
+        if self._built_version != self._version:
+            self._initFrameList()
 
     def stride(self, n):
         """
         Set the stride of the combined trajectory
         """
         self._stride = n
-        self._stale = 1
+        self._invalidate()
 
     def skip(self, n):
         """
         Set the skip of the combined trajectory
         """
         self._skip = n
-        self._stale = 1
+        self._invalidate()
 
     def allStride(self, n):
         """
         Sets the stride of all contained trajectories
         """
-        self._stale = 1
+        self._invalidate()
         for t in self._trajectories:
             t.stride(n)
 
@@ -385,7 +588,7 @@ class VirtualTrajectory(object):
         """
         Sets the skip of all contained trajectories
         """
-        self._stale = 1
+        self._invalidate()
         for t in self._trajectories:
             t.skip(n)
 
@@ -401,11 +604,10 @@ class VirtualTrajectory(object):
         Return the current frame/model.  If the iterator is past the
         end of the trajectory list, return the last valid frame.
         """
-        if self._stale:
-            self._initFrameList()
+        self._ensureFrameList()
 
-        if self._index >= len(self._framelist):
-            i = len(self._framelist) - 1
+        if self._index >= self._n:
+            i = self._n - 1
         else:
             i = self._index
 
@@ -455,45 +657,53 @@ class VirtualTrajectory(object):
         Return info about where a frame comes from.
         >>> (frame-index, traj-index, trajectory, real-frame-within-trajectory) = vtraj.frameLocation(i)
         """
-        if (self._stale):
-            self._initFrameList()
+        self._ensureFrameList()
 
         if (i < 0):
-            i += len(self._framelist)
+            i += self._n
 
         t = self._trajectories[self._trajlist[i]]
-        return( self._framelist[i], self._trajlist[i], t, t.frameNumber(self._framelist[i]))
+        return( int(self._framelist[i]), int(self._trajlist[i]), t, t.frameNumber(int(self._framelist[i])))
 
     def _initFrameList(self):
-        frames = []
-        trajs = []
-        for j in range(len(self._trajectories)):
-            t = self._trajectories[j]
-            for i in range(len(t)):
-                frames.append(i)
-                trajs.append(j)
+        lens = numpy.fromiter((len(t) for t in self._trajectories),
+                              dtype=numpy.int64, count=len(self._trajectories))
 
-        self._framelist = []
-        self._trajlist = []
-        n = len(frames)
         if (self._iterator is None):
-            it = iter(range(self._skip, n, self._stride))
+            if lens.size > 0:
+                frames = numpy.concatenate([numpy.arange(n, dtype=numpy.int64) for n in lens])
+                trajs = numpy.repeat(numpy.arange(lens.size, dtype=numpy.int64), lens)
+            else:
+                frames = numpy.empty(0, dtype=numpy.int64)
+                trajs = numpy.empty(0, dtype=numpy.int64)
+            self._framelist = frames[self._skip::self._stride]
+            self._trajlist = trajs[self._skip::self._stride]
         else:
-            it = iter(iterator)
-        for i in it:
-            self._framelist.append(frames[i])
-            self._trajlist.append(trajs[i])
-
+            # Translate each composite index straight into a (trajectory,
+            # frame) pair with a prefix-sum lookup; cost scales with the
+            # iterator length, not the total frame count.
+            offsets = numpy.concatenate((numpy.zeros(1, dtype=numpy.int64),
+                                         numpy.cumsum(lens)))
+            indices = numpy.fromiter(self._iterator, dtype=numpy.int64)
+            total = int(offsets[-1])
+            indices = numpy.where(indices < 0, indices + total, indices)
+            if indices.size and (int(indices.min()) < 0
+                                 or int(indices.max()) >= total):
+                raise IndexError('composite frame index out of range')
+            self._trajlist = numpy.searchsorted(offsets, indices, side='right') - 1
+            self._framelist = indices - offsets[self._trajlist]
+
+        self._packed = (self._trajlist << _PACK_SHIFT) | self._framelist
+        self._n = self._framelist.size
         self._index = 0
-        self._stale = 0
+        self._built_version = self._version
 
     def __len__(self):
         """
         Total number of frames
         """
-        if self._stale:
-            self._initFrameList()
-        return(len(self._framelist))
+        self._ensureFrameList()
+        return(self._n)
 
 
     def __getitem__(self, i):
@@ -502,23 +712,22 @@ class VirtualTrajectory(object):
         Python slicing.  Negative indices are relative to the end of
         the composite trajectory.
         """
-        if self._stale:
-            self._initFrameList()
+        self._ensureFrameList()
 
         if isinstance(i, slice):
             return(self._getSlice(i))
 
         if (i < 0):
-            i += len(self)
-        if (i >= len(self)):
+            i += self._n
+        if (i >= self._n):
             raise IndexError
 
-        return(self._trajectories[self._trajlist[i]][self._framelist[i]])
+        p = int(self._packed[i])
+        return(self._trajectories[p >> _PACK_SHIFT][p & _PACK_MASK])
 
 
     def __iter__(self):
-        if self._stale:
-            self._initFrameList()
+        self._ensureFrameList()
         self._index = 0
         return(self)
 
@@ -526,13 +735,15 @@ class VirtualTrajectory(object):
         self._index = 0
 
     def __next__(self):
-        if self._stale:
+        # Inlined hot path, mirroring Trajectory.__next__
+        if self._built_version != self._version:
             self._initFrameList()
-        if (self._index >= len(self._framelist)):
+        i = self._index
+        if (i >= self._n):
             raise StopIteration
-        frame = self.__getitem__(self._index)
-        self._index += 1
-        return(frame)
+        p = int(self._packed[i])
+        self._index = i + 1
+        return(self._trajectories[p >> _PACK_SHIFT][p & _PACK_MASK])
 
     def _getSlice(self, s):
         indices = list(range(*s.indices(self.__len__())))
@@ -543,6 +754,55 @@ class VirtualTrajectory(object):
         return(ensemble)
 
 
+    def iterSlice(self, s=None):
+        """
+        Generator over a slice of the composite trajectory.  Yields one
+        copied frame at a time instead of materializing the whole ensemble
+        the way slicing does.
+        """
+        self._ensureFrameList()
+        if s is None:
+            s = slice(None)
+        for i in range(*s.indices(self._n)):
+            yield(self._trajectories[self._trajlist[i]][self._framelist[i]].copy())
+
+
+    def coordsForSlice(self, s=None, dtype=numpy.float32):
+        """
+        Read a batch of frames and return the subset coordinates as a single
+        contiguous (nframes, natoms, 3) numpy array.  The argument may be a
+        slice, an iterable of indices, or None (meaning every frame).  Unlike
+        slicing, which copies an AtomicGroup per frame, this fills one
+        preallocated buffer; frames are read in (trajectory, frame) order so
+        the underlying files are streamed sequentially.  The subsets of all
+        managed trajectories must have the same number of atoms.
+        """
+        self._ensureFrameList()
+        if s is None:
+            indices = numpy.arange(self._n, dtype=numpy.int64)
+        elif isinstance(s, slice):
+            indices = numpy.arange(*s.indices(self._n), dtype=numpy.int64)
+        else:
+            # copy=True: asarray can return the caller's own array, and the
+            # negative-index normalization must not mutate it
+            indices = numpy.array(s, dtype=numpy.int64, copy=True)
+            indices[indices < 0] += self._n
+
+        coords = None
+        order = numpy.lexsort((self._framelist[indices], self._trajlist[indices]))
+        for k in order:
+            i = int(indices[k])
+            t = self._trajectories[self._trajlist[i]]
+            t.readFrame(int(self._framelist[i]))
+            if coords is None:
+                coords = numpy.empty((indices.size, len(t.frame()), 3), dtype=dtype)
+            coords[k] = t.frame().getCoords()
+
+        if coords is None:
+            coords = numpy.empty((0, 0, 3), dtype=dtype)
+        return(coords)
+
+
 
 ## A virtual trajectory that supports iterative alignment.
 # Only the
@@ -555,6 +815,7 @@ class VirtualTrajectory(object):
 # ------------|------------------------------------------------------------------------------
 # alignwith=s | Use 's' to select what part of the model is used for aligning.
 # reference=g | Use the AtomicGroup g as a reference structure.  All frames will be aligned to it.
+# dtype=d     | Numpy dtype used to store the alignment transforms (default numpy.float32).
 #
 # There are two ways that a trajectory can be aligned.  The first
 # uses in iterative alignment method (the same used in LOOS).  This
@@ -607,6 +868,11 @@ class AlignedVirtualTrajectory(VirtualTrajectory):
     New keywords:
       alignwith = Selection used for alignment (default is all C-alphas)
       reference = AtomicGroup that all frames are aligned to (disables iterative alignment)
+          dtype = Numpy dtype for the stored transforms (default numpy.float32;
+                  the iterative alignment itself always runs in double precision)
+        workers = Max threads used to read/align trajectories in parallel
+                  (default is the CPU count; only used when every trajectory
+                  has its own model)
 
     See the Doxygen documentation for more details.
     """
@@ -614,7 +880,9 @@ class AlignedVirtualTrajectory(VirtualTrajectory):
     def __init__(self, *trajs, **kwargs):
         super(AlignedVirtualTrajectory, self).__init__(*trajs, **kwargs)
         self._aligned = False
-        self._xformlist = []
+        self._xforms = None
+        self._xformcache = []
+        self._subset_cache = {}
         self._rmsd = -1
         self._iters = -1
         if 'alignwith' in kwargs:
@@ -622,8 +890,18 @@ class AlignedVirtualTrajectory(VirtualTrajectory):
         else:
             self._alignwith = 'name == "CA"'
 
-        if 'reference' in kwargs:
-            self._reference = copy.deepcopy(kwargs['reference'])
+        if 'dtype' in kwargs:
+            self._dtype = kwargs['dtype']
+        else:
+            self._dtype = numpy.float32
+
+        if 'workers' in kwargs:
+            self._workers = kwargs['workers']
+        else:
+            self._workers = os.cpu_count()
+
+        if 'reference' in kwargs and kwargs['reference'] is not None:
+            self._reference = kwargs['reference'].copy()
         else:
             self._reference = None
 
@@ -642,13 +920,14 @@ class AlignedVirtualTrajectory(VirtualTrajectory):
                     raise TypeError("Inputs to VirtualTrajectory must be pyloos Trajectory objects")
 
         self._trajectories.extend(traj)
-        self._stale = True
+        self._invalidate()
         self._aligned = False
 
     def alignWith(self, selection):
         """
         Change the selection used to align with.  Requires re-aligning
         """
+        self._subset_cache.clear()
         self._alignwith = selection
         self._aligned = False
 
@@ -658,53 +937,118 @@ class AlignedVirtualTrajectory(VirtualTrajectory):
         self._index = 0
         return(self)
 
+    def __next__(self):
+        if not self._aligned:
+            self._align()
+        i = self._index
+        if (i >= self._n):
+            raise StopIteration
+        p = int(self._packed[i])
+        t = self._trajectories[p >> _PACK_SHIFT]
+        frame = t[p & _PACK_MASK]
+        frame.applyTransform(self._xform(i))
+        # The transform mutated the shared model in place, so the cached
+        # last-read frame no longer matches what is on disk.
+        t.invalidate()
+        self._index = i + 1
+        return(frame)
+
 
     def setReference(self, reference):
-        self._reference = copy.deepcopy(reference)
+        self._reference = reference.copy() if reference is not None else None
         self._aligned = False
 
+    def _alignSubset(self, model):
+        """
+        Return the alignwith subset of a model, parsing the selection at
+        most once per model.  The cache lives on the instance (and holds the
+        model so its id cannot be recycled), so it goes away with the AVT
+        and alignWith() can clear it wholesale.
+        """
+        key = id(model)
+        try:
+            return(self._subset_cache[key][1])
+        except KeyError:
+            subset = loos.selectAtoms(model, self._alignwith)
+            self._subset_cache[key] = (model, subset)
+            return(subset)
+
+    def _runGroups(self, task, groups):
+        """
+        Run a per-trajectory task over index groups, using a thread pool when
+        it is safe to do so.  Each trajectory owns its own file handle, but
+        trajectories may share a model, in which case concurrent reads would
+        race on the shared coordinates, so parallel execution requires every
+        managed trajectory to have a distinct model.
+        """
+        models = set(id(t.model()) for t in self._trajectories)
+        if (self._workers > 1 and len(groups) > 1
+                and len(models) == len(self._trajectories)):
+            with ThreadPoolExecutor(max_workers=self._workers) as pool:
+                list(pool.map(task, groups))
+        else:
+            for g in groups:
+                task(g)
+
     def _align(self):
         """
         Align the frames (called implicitly on iterator or array access)
         """
-        current_traj = None
-        current_subset = None
-        ensemble = []
+        self._ensureFrameList()
 
-        if self._stale:
-            self._initFrameList()
+        # Visit frames grouped by trajectory and in ascending frame order so
+        # the underlying files are streamed sequentially rather than seeked
+        # at random (a user iterator may interleave trajectories).  Results
+        # are scattered back to their virtual-frame positions afterwards.
+        order = numpy.lexsort((self._framelist, self._trajlist))
+        groups = [order[self._trajlist[order] == j]
+                  for j in numpy.unique(self._trajlist)]
 
         if self._reference:       # Align to a reference structure
-            self._xformlist = []
-            for i in range(len(self._framelist)):
-                t = self._trajectories[self._trajlist[i]]
-                if t != current_traj:
-                    current_traj = t
-                    current_subset = loos.selectAtoms(t.model(), self._alignwith)
-                t.readFrame(self._framelist[i])
-                m = current_subset.superposition(self._reference)
-                x = loos.XForm()
-                x.load(m)
-                self._xformlist.append(x)
+            xforms = numpy.empty((self._n, 4, 4), dtype=self._dtype)
+
+            def alignGroup(indices):
+                t = self._trajectories[self._trajlist[indices[0]]]
+                subset = self._alignSubset(t.model())
+                for i in indices:
+                    t.readFrame(int(self._framelist[i]))
+                    xforms[i] = _gmatrixToArray(subset.superposition(self._reference))
 
+            self._runGroups(alignGroup, groups)
             self._rmsd = 0.0
             self._iters = 0
 
         else:                      # Iterative alignment
 
-            ensemble = loos.DoubleVectorMatrix()
+            rows = [None] * self._n
 
-            for i in range(len(self._framelist)):
-                t = self._trajectories[self._trajlist[i]]
-                if t != current_traj:
-                    current_traj = t
-                    current_subset = loos.selectAtoms(t.model(), self._alignwith)
-                t.readFrame(self._framelist[i])
-                ensemble.push_back(current_subset.coordsAsVector())
+            def readGroup(indices):
+                t = self._trajectories[self._trajlist[indices[0]]]
+                subset = self._alignSubset(t.model())
+                for i in indices:
+                    t.readFrame(int(self._framelist[i]))
+                    rows[i] = subset.coordsAsVector()
 
-            result = loos.iterativeAlignmentPy(ensemble)
-            (self._xformlist, self._rmsd, self._iters) = (loos.xformVectorToList(result.transforms), result.rmsd, result.iterations)
+            self._runGroups(readGroup, groups)
+
+            # Size the ensemble once so pushing N coordinate rows does not
+            # repeatedly reallocate the underlying C++ vector.
+            ensemble = loos.DoubleVectorMatrix()
+            ensemble.reserve(self._n)
+            for i in order:
+                ensemble.push_back(rows[i])
+                rows[i] = None
 
+            result = loos.iterativeAlignmentPy(ensemble)
+            del ensemble           # release the cached coordinates promptly
+            sorted_xforms = loos.xformVectorToList(result.transforms)
+            xforms = numpy.empty((self._n, 4, 4), dtype=self._dtype)
+            for (k, i) in enumerate(order):
+                xforms[i] = _gmatrixToArray(sorted_xforms[k].current())
+            (self._rmsd, self._iters) = (result.rmsd, result.iterations)
+
+        self._xforms = xforms
+        self._xformcache = [None] * self._n
         self._aligned = True
 
 
@@ -714,17 +1058,47 @@ class AlignedVirtualTrajectory(VirtualTrajectory):
     def iters(self):
         return(self._iters)
 
+    def xforms(self):
+        """
+        Return the alignment transforms as an (N, 4, 4) numpy array
+        """
+        if not self._aligned:
+            self._align()
+        return(self._xforms)
+
+    def _xform(self, i):
+        x = self._xformcache[i]
+        if x is None:
+            x = _xformFromArray(self._xforms[i])
+            self._xformcache[i] = x
+        return(x)
+
 
     def _getSlice(self, s):
         indices = list(range(*s.indices(self.__len__())))
         ensemble = []
         for i in indices:
             frame = self._trajectories[self._trajlist[i]][self._framelist[i]].copy()
-            frame.applyTransform(self._xformlist[i])
+            frame.applyTransform(self._xform(i))
             ensemble.append(frame)
         return(ensemble)
 
 
+    def iterSlice(self, s=None):
+        """
+        Generator over a slice of the aligned trajectory.  Yields one copied,
+        aligned frame at a time instead of materializing the whole ensemble.
+        """
+        if not self._aligned:
+            self._align()
+        if s is None:
+            s = slice(None)
+        for i in range(*s.indices(self._n)):
+            frame = self._trajectories[self._trajlist[i]][self._framelist[i]].copy()
+            frame.applyTransform(self._xform(i))
+            yield(frame)
+
+
     def __getitem__(self, i):
         """
         Returns the ith frame aligned.  Supports Python slices.  Negative indices are relative
@@ -737,10 +1111,15 @@ class AlignedVirtualTrajectory(VirtualTrajectory):
             return(self._getSlice(i))
 
         if (i < 0):
-            i += len(self._framelist)
-        if (i >= len(self._framelist)):
+            i += self._n
+        if (i >= self._n):
             raise IndexError
 
-        frame = self._trajectories[self._trajlist[i]][self._framelist[i]]
-        frame.applyTransform(self._xformlist[i])
+        p = int(self._packed[i])
+        t = self._trajectories[p >> _PACK_SHIFT]
+        frame = t[p & _PACK_MASK]
+        frame.applyTransform(self._xform(i))
+        # The transform mutated the shared model in place, so the cached
+        # last-read frame no longer matches what is on disk.
+        t.invalidate()
         return(frame)